@@ -3,14 +3,314 @@ import os
 import names
 import uuid
 import shutil
-import calendar
 import operator
 import logging
 import re
+import mmap
+import struct
+import contextlib
+import zlib
+import math
 from unidecode import unidecode
 import pickle as pk
+import numpy as np
 from datetime import datetime as dt
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+def _to_str(value: str) -> str:
+    """
+    Validate a value of a text field
+
+    Args:
+        value (str): The value
+
+    Returns:
+        str: The value unchanged
+
+    Raises:
+        TypeError: If the value is not a string
+    """
+    if not isinstance(value, str):
+        raise TypeError(f"Expected a string, got {type(value).__name__}")
+    return value
+
+def _to_int(value: str | int | float) -> int:
+    """
+    Convert a value of an integer field
+
+    Args:
+        value (str | int | float): The value, as a string, an integer or a float with no fractional part
+
+    Returns:
+        int: The converted value
+
+    Raises:
+        ValueError: If the value is a string that is not an integer, or a float with a fractional part
+        TypeError: If the value is of any other type, including bool
+    """
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise TypeError(f"Expected an integer, got {type(value).__name__}")
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"Expected an integer, got {value!r}")
+    return int(value)
+
+def _to_float(value: str | int | float) -> float:
+    """
+    Convert a value of a decimal field
+
+    Args:
+        value (str | int | float): The value, as a string or a number. NaN stands for an unknown value
+
+    Returns:
+        float: The converted value
+
+    Raises:
+        ValueError: If the value is a string that is not a number, or is infinite
+        TypeError: If the value is of any other type, including bool
+    """
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise TypeError(f"Expected a number, got {type(value).__name__}")
+    value = float(value)
+    if math.isinf(value):
+        raise ValueError(f"Expected a finite number, got {value!r}")
+    return value
+
+def _to_ordinal(value: str | int) -> int:
+    """
+    Convert a date in "YYYY-MM-DD" format to its proleptic Gregorian ordinal, the form dates are stored in
+
+    Args:
+        value (str | int): The date string, or an ordinal which is returned unchanged. An empty string
+                           or 0 stands for an unknown date
+
+    Returns:
+        int: The ordinal of the date
+
+    Raises:
+        ValueError: If the value is not a valid date, or an ordinal out of range
+        TypeError: If the value is of any other type, including bool
+    """
+    if isinstance(value, str):
+        return dt.fromisoformat(value).toordinal() if value else 0
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"Expected a date, got {type(value).__name__}")
+    if not 0 <= value <= dt.max.toordinal():
+        raise ValueError(f"Date ordinal out of range: {value}")
+    return value
+
+# Codes of the comparison operators understood by _filter
+_OPERATOR_CODES = {'==': 0, '!=': 1, '<': 2, '<=': 3, '>': 4, '>=': 5}
+
+if njit is not None:
+    @njit(cache=True)
+    def _filter(column: np.ndarray, live: np.ndarray, op_code: int, value) -> np.ndarray:
+        """
+        Find the live rows of a column that compare true against a value, in a single pass
+
+        Only defined when Numba is installed; otherwise columns are always compared with NumPy operators
+
+        Args:
+            column (np.ndarray): The values of the column
+            live (np.ndarray): Whether each row belongs to an employee still in the database
+            op_code (int): The comparison, as a value of _OPERATOR_CODES
+            value: The scalar to compare against
+
+        Returns:
+            np.ndarray: The indices of the matching rows
+        """
+        rows = np.empty(len(column), dtype=np.intp)
+        count = 0
+        # One branch-free loop per operator, so the comparison is not dispatched on every row
+        if op_code == 0:
+            for row in range(len(column)):
+                rows[count] = row
+                count += live[row] & (column[row] == value)
+        elif op_code == 1:
+            for row in range(len(column)):
+                rows[count] = row
+                count += live[row] & (column[row] != value)
+        elif op_code == 2:
+            for row in range(len(column)):
+                rows[count] = row
+                count += live[row] & (column[row] < value)
+        elif op_code == 3:
+            for row in range(len(column)):
+                rows[count] = row
+                count += live[row] & (column[row] <= value)
+        elif op_code == 4:
+            for row in range(len(column)):
+                rows[count] = row
+                count += live[row] & (column[row] > value)
+        else:
+            for row in range(len(column)):
+                rows[count] = row
+                count += live[row] & (column[row] >= value)
+        return rows[:count]
+else:
+    _filter = None
+
+class _EmployeeColumns:
+
+    """
+    A column-oriented copy of the numeric employee fields, used to filter employees with vectorized comparisons
+
+    Each field is held in a NumPy array with one row per employee. Removing an employee only marks its row as dead,
+    and dead rows are dropped once they outnumber the live ones
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, dtypes: dict, employees: dict, cast):
+
+        """
+        Build the columns from the current employee records
+
+        Args:
+            dtypes (dict): The NumPy dtype of each field to store as a column
+            employees (dict): The employee records keyed by their 16-byte ID
+            cast: A function converting a field name and stored value to the field's type
+
+        Attributes:
+            columns (dict): The array of each field. Fields holding a value that cannot be converted to the column's dtype are left out
+        """
+
+        self._cast = cast
+        capacity = max(len(employees), self.INITIAL_CAPACITY)
+        self._ids = np.empty(capacity, dtype=object)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._rows = {}
+        self._size = 0
+        self.columns = {field: np.empty(capacity, dtype=dtype) for field, dtype in dtypes.items()}
+
+        for field in list(self.columns):
+            try:
+                self.columns[field][:len(employees)] = [cast(field, employee[field]) for employee in employees.values()]
+            except (ValueError, TypeError):
+                del self.columns[field]
+        for row, id_ in enumerate(employees):
+            self._ids[row] = id_
+            self._rows[id_] = row
+        self._live[:len(employees)] = True
+        self._size = len(employees)
+
+    def add(self, id_: bytes, employee: dict) -> None:
+        """
+        Append a row for a new employee
+
+        Args:
+            id_ (bytes): The unique identifier of the employee
+            employee (dict): The employee's data
+        """
+        if self._size == len(self._ids):
+            self._resize(2 * len(self._ids))
+        row = self._size
+        for field in list(self.columns):
+            self.set(row, field, employee[field])
+        self._ids[row] = id_
+        self._live[row] = True
+        self._rows[id_] = row
+        self._size += 1
+
+    def remove(self, id_: bytes) -> None:
+        """
+        Mark the row of a removed employee as dead
+
+        Args:
+            id_ (bytes): The unique identifier of the employee
+        """
+        row = self._rows.pop(id_, None)
+        if row is None:
+            return
+        self._live[row] = False
+        self._ids[row] = None
+        if 2 * len(self._rows) < self._size:
+            self._resize(max(2 * len(self._rows), self.INITIAL_CAPACITY))
+
+    def update(self, id_: bytes, field_name: str, value: str) -> None:
+        """
+        Update the value of a field for an employee
+
+        Args:
+            id_ (bytes): The unique identifier of the employee
+            field_name (str): The name of the field
+            value (str): The new value of the field
+        """
+        row = self._rows.get(id_)
+        if row is not None and field_name in self.columns:
+            self.set(row, field_name, value)
+
+    def set(self, row: int, field_name: str, value: str) -> None:
+        """
+        Store a value in a column, dropping the column if the value cannot be converted to its dtype
+
+        Args:
+            row (int): The row of the employee
+            field_name (str): The name of the field
+            value (str): The value to store
+        """
+        try:
+            self.columns[field_name][row] = self._cast(field_name, value)
+        except (ValueError, TypeError):
+            logging.warning(f"Field '{field_name}' holds a non-numeric value and can no longer be filtered by column.")
+            del self.columns[field_name]
+
+    def select(self, field_name: str, operator_: str, comparison_function, value, jit_min_rows: int = None) -> np.ndarray:
+        """
+        Find the employees whose field compares true against a value
+
+        Args:
+            field_name (str): The name of the field, which must be one of columns
+            operator_ (str): The comparison operator ('==', '!=', '<', '<=', '>', or '>=')
+            comparison_function: The matching comparison function from the operator module
+            value: The value to compare against, already converted to the field's type
+            jit_min_rows (int, optional): The number of rows from which the compiled _filter kernel is used, if Numba is installed. Defaults to None, always comparing with NumPy
+
+        Returns:
+            np.ndarray: The IDs of the matching employees
+
+        Raises:
+            ValueError: If the value is not a number
+        """
+        column = self.columns[field_name][:self._size]
+        live = self._live[:self._size]
+        value = np.asarray(value)
+        if value.dtype.kind not in 'iuf':
+            raise ValueError(f"Cannot compare field '{field_name}' with {value!r}")
+
+        if _filter is not None and jit_min_rows is not None and self._size >= jit_min_rows:
+            return self._ids[_filter(column, live, _OPERATOR_CODES[operator_], value[()])]
+        return self._ids[:self._size][comparison_function(column, value) & live]
+
+    def _resize(self, capacity: int) -> None:
+        """
+        Move the live rows into arrays of a new capacity, dropping the dead rows
+
+        Args:
+            capacity (int): The new number of rows allocated
+        """
+        live = np.flatnonzero(self._live[:self._size])
+        size = len(live)
+        ids = np.empty(capacity, dtype=object)
+        ids[:size] = self._ids[live]
+        self._ids = ids
+        for field, column in self.columns.items():
+            resized = np.empty(capacity, dtype=column.dtype)
+            resized[:size] = column[live]
+            self.columns[field] = resized
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[:size] = True
+        self._rows = {id_: row for row, id_ in enumerate(ids[:size])}
+        self._size = size
+
 class EmployeeDatabase:
 
     """
@@ -23,8 +323,78 @@ class EmployeeDatabase:
     
     DEFAULT_MAX_EMPLOYEES = 9999
     DEFAULT_COMPANY_NAME = "Company Name"
+    # 'strict' syncs every change to disk, 'relaxed' only at explicit sync points: flush, close, the end of
+    # a bulk_update block and snapshots. In relaxed mode a crash can lose the changes made since the last sync
+    # point. A change whose frame was only partly written is discarded when the database is next loaded
+    DURABILITY_MODES = ('relaxed', 'strict')
+    DEFAULT_DURABILITY = 'relaxed'
+    # Formats of the portable snapshots written by export, which require msgspec
+    EXPORT_FORMATS = ('msgpack', 'json')
+
+    # The database file is a log of frames, each a header followed by its body. The header holds the
+    # big-endian body length, a CRC32 of that length and a CRC32 of the body, so a frame cut short by a
+    # crash can be told apart from a corrupted one.
+    # The first frame is the pickled header; every other frame starts with an operation code and the
+    # 16-byte employee ID, followed for OP_PUT by the employee record, so the log can be indexed
+    # without decoding any record
+    FRAME_HEADER = struct.Struct('>III')
+    FRAME_LENGTH = struct.Struct('>I')
+    RECORD_HEADER = struct.Struct('>c16s')
+    OP_PUT = b'P'
+    OP_REMOVE = b'R'
+    # Fixed layout of an employee record: departamento, sueldo, fecha and the UTF-8 byte lengths of
+    # nombre, apellido and email, followed by those three strings. Records are decoded straight from
+    # the mapped file with no deserializer in between
+    EMPLOYEE_LAYOUT = struct.Struct('>qdiHHH')
+    # Version of the frame layout, stored in the header frame
+    FORMAT_VERSION = 1
+    # Rewrite the log as a fresh snapshot once it grows past this multiple of the live data
+    COMPACTION_RATIO = 2
+    # Newer protocols pickle faster and more compactly; the loader reads any protocol
+    PICKLE_PROTOCOL = pk.HIGHEST_PROTOCOL
+    # Write buffer size, large enough for a whole snapshot of a typical database to go out in a few syscalls
+    IO_BUFFER_SIZE = 1 << 20
+    # Fields with an equality index, mapping each cast value to the IDs of the employees holding it
+    INDEXED_FIELDS = ('nombre', 'apellido', 'departamento')
+    # Column size from which numeric fields are filtered with a Numba kernel, if installed. The kernel is compiled on
+    # first use for each column and value type, which takes a fraction of a second, so it is off by default and only
+    # pays off for large databases queried many times by a long-running process
+    JIT_FILTER_MIN_ROWS = None
+    # Days in each month for common and leap years
+    DAYS_IN_MONTH = (
+        (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31),
+        (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+    )
+    # NumPy dtype of the fields kept as columns, so comparisons on them run vectorized
+    COLUMN_DTYPES = {
+        'departamento': np.int64,
+        'sueldo': np.float64,
+        'fecha': np.int64
+    }
+    # Validates and converts each employee field to the type it is stored as, also used to cast query values
+    # without trial conversion
+    FIELD_TYPES = {
+        'nombre': _to_str,
+        'apellido': _to_str,
+        'departamento': _to_int,
+        'sueldo': _to_float,
+        'fecha': _to_ordinal,
+        'email': _to_str
+    }
+    # Stored in place of a value that cannot be converted when converting a file written before fields were
+    # typed, as its department and salary could hold any string. The original file is kept at "<path>.legacy"
+    MISSING_VALUES = {
+        'departamento': 0,
+        'sueldo': math.nan,
+        'fecha': 0
+    }
+    # Splits the local part of an email address into the name it was issued for and its numeric suffix,
+    # as names never contain digits
+    EMAIL_SUFFIX_PATTERN = re.compile(r'(.*?)(\d*)@')
+    # Deletes every ASCII character except lowercase letters, which is all unidecode can output
+    NORMALIZE_TABLE = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not 'a' <= chr(c) <= 'z'))
     
-    def __init__(self, file_path: str, company_name: str = None, email_suffix: str = None, max_employees: int = None):
+    def __init__(self, file_path: str, company_name: str = None, email_suffix: str = None, max_employees: int = None, durability: str = None):
 
         """
         Initializes an EmployeeDatabase instance with a specified file path and an optional maximum employee limit
@@ -34,26 +404,61 @@ class EmployeeDatabase:
             company_name (str, optional): The name of the company associated with the database. Defaults to DEFAULT_COMPANY_NAME
             email_suffix (str, optional): The email suffix used for employee email addresses. Defaults to None
             max_employees (int, optional): The maximum number of employees allowed. Defaults to DEFAULT_MAX_EMPLOYEES
+            durability (str, optional): When changes are synced to disk, one of DURABILITY_MODES. Defaults to DEFAULT_DURABILITY
 
         Attributes:
             FILE_PATH (str): The path to the database file
             COMPANY_NAME (str): The name of the company associated with the database
             CREATION_DATE (datetime): The date when the database was created or initialized
             MAX_EMPLOYEES (int): The maximum number of employees allowed in the database
+            DURABILITY (str): When changes are synced to disk
             employees (dict): A dictionary holding employee records
+
+        Raises:
+            ValueError: If durability is not one of DURABILITY_MODES, or the database file holds a value that
+                        cannot be converted to the current format
+            OSError: If the database file cannot be converted to the current format
         """
 
         self.FILE_PATH = file_path
         self.COMPANY_NAME = company_name if company_name is not None else self.DEFAULT_COMPANY_NAME
         self.CREATION_DATE = dt.now()
         self.MAX_EMPLOYEES = max_employees if max_employees is not None else self.DEFAULT_MAX_EMPLOYEES
+        self.DURABILITY = durability if durability is not None else self.DEFAULT_DURABILITY
+
+        if self.DURABILITY not in self.DURABILITY_MODES:
+            raise ValueError(f"Invalid durability '{self.DURABILITY}': Must be one of {self.DURABILITY_MODES}.")
 
         if email_suffix is None:
             self.EMAIL_SUFFIX = self.normalize_string(self.COMPANY_NAME)
         else:
             self.EMAIL_SUFFIX = self.normalize_string(email_suffix)
 
-        self.employees = {}
+        # Records read from the database file so far, and the location in the file of those not yet read
+        self._employees = {}
+        self._offsets = {}
+        self._mmap = None
+
+        # Private random generator, seeded from os.urandom, and the year birth dates are generated relative to
+        self._rng = random.Random()
+        self._current_year = dt.now().year
+
+        # Open append handle on the log and the byte counts used to decide when to compact it
+        self._log_file = None
+        self._file_size = 0
+        self._header_size = 0
+        self._live_size = 0
+        self._frame_sizes = {}
+        # Nesting depth of bulk_update blocks, and the file size their changes are appended from
+        self._bulk_depth = 0
+        self._bulk_start_size = 0
+
+        # Highest email suffix issued per (first name, surname), 0 meaning no suffix, and the
+        # equality indexes. Both are built on first use, as they need every record to be read
+        self._name_index = None
+        self._indexes = None
+        # Column-oriented copy of COLUMN_DTYPES fields, also built on first use
+        self._columns = None
 
         self._load_data()
 
@@ -67,8 +472,7 @@ class EmployeeDatabase:
         Returns:
             str: The normalized string containing only lowercase alphabetic characters
         """
-        ascii_filtered = unidecode(str).lower()
-        return re.sub(r'[^a-z]', '', ascii_filtered)
+        return unidecode(str).lower().translate(self.NORMALIZE_TABLE)
     
     def _load_data(self) -> None:
         """
@@ -78,54 +482,47 @@ class EmployeeDatabase:
         
         It performs the following steps:
         
-        1. Creates a backup of the existing database file (if it exists) for recovery purposes
-        2. Verifies whether the database file exists and is non-empty
-        3. Attempts to load the file using pickle
+        1. Verifies whether the database file exists and is non-empty
+        2. Attempts to index the frame log, recording where the latest version of each employee record is
+            Records are only decoded when first accessed
+            Files written before the frame log are loaded in full and rewritten in the current format
             If the file is invalid or corrupted:
+            - Moves it aside to a ".corrupt" file, so it is never overwritten
             - If a backup exists, attempts to restore the database from the backup
             - Logs relevant error messages and handles exceptions
+        3. Once the file is loaded, replaces the backup with it for recovery purposes, unless a partially
+            written frame had to be discarded from its end
         4. If the file does not exist or is empty, initializes a new database with default values
-        5. Serializes and stores the initialized data in a new database file if loading fails
+        5. Writes a fresh snapshot of the initialized data to the database file if loading fails
 
         Raises:
-            ValueError: If the file format is invalid or missing required keys
-            EOFError: If the file is unexpectedly truncated
-            pk.UnpicklingError: If an error occurs while unpickling the file
+            ValueError: If a file written before the frame log holds a value that cannot be converted to its field's type
+            OSError: If a file written before the frame log cannot be rewritten in the current format,
+                     or a file that failed to load cannot be moved aside
         """
         
-        # Create a backup in case of failure
-        backup_file_path = f"{self.FILE_PATH}.bak"
-        if os.path.exists(self.FILE_PATH):
-            shutil.copy2(self.FILE_PATH, backup_file_path)
-            logging.info(f"Backup created at {backup_file_path}.")
-        
+        self.close()
+
         # Verify file exists and is not empty
         if os.path.exists(self.FILE_PATH) and os.path.getsize(self.FILE_PATH) > 0:
             try:
-                with open(self.FILE_PATH, 'rb') as file:
-                    data = pk.load(file)
-                    
-                    if 'metadata' not in data or 'employees' not in data:
-                        raise ValueError("Invalid database file format: Missing required keys.")
-                        
-                    metadata = data['metadata']
-                    _creation_date = metadata['creation_date']
-                    self.CREATION_DATE = dt.strptime(_creation_date, "%Y-%m-%d")
-                    self.COMPANY_NAME = metadata['company_name']
-                    self.EMAIL_SUFFIX = metadata['email_suffix']
-                    self.MAX_EMPLOYEES = metadata['max_employees']
-                    self.employees = data['employees']
-                    
-                    logging.info(f"Database loaded successfully from {self.FILE_PATH}")
-                    return
+                legacy_data, complete = self._read_database()
             except (EOFError, pk.UnpicklingError) as e:
                 logging.critical(f"Error loading existing database: {e}.\nWill attempt to restore from backup.")
+                self._set_aside_unreadable_file()
                 if self.restore_from_backup():
                     return
             except ValueError as e:
-                logging.error(f"Data validation error: {e}")
+                logging.critical(f"Data validation error: {e}.\nWill attempt to restore from backup.")
+                self._set_aside_unreadable_file()
+                if self.restore_from_backup():
+                    return
             except Exception as e:
                 logging.error(f"Unexpected error loading file: {e}")
+                self._set_aside_unreadable_file()
+            else:
+                self._finish_loading(legacy_data, back_up=complete)
+                return
                 
         elif not os.path.exists(self.FILE_PATH):
             logging.warning("No database file found")
@@ -134,17 +531,453 @@ class EmployeeDatabase:
                 
         # Initialize to default if database does not exist or loading fails
         logging.info("Initializing empty database.")
-        _metadata = self.generate_metadata()
-        data = {
-            'metadata': _metadata,
-            'employees': {}
-        }
+        self.employees = {}
+        self._name_index = None
+        self._indexes = None
+        self._columns = None
         
         # Create or overwrite the file with the initialized data
-        with open(self.FILE_PATH, 'wb') as file:
-            pk.dump(data, file)
+        self._write_snapshot()
         
         logging.info(f"Initialized empty database at {self.FILE_PATH}")
+
+    def _read_database(self) -> tuple:
+        """
+        Read the metadata of the database file and index the frames of its log
+
+        A partially written frame at the end of the log is cut off the file
+
+        Returns:
+            tuple: The unpickled database if the file was written before the frame log and still has to be
+                   converted, None otherwise, and whether the file was read without discarding a partial frame
+
+        Raises:
+            ValueError: If the file format is invalid or missing required keys
+            EOFError: If the header frame is truncated
+            pk.UnpicklingError: If an error occurs while unpickling the file
+        """
+        with open(self.FILE_PATH, 'rb') as file:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            # Files written before the frame log are a single pickle, which starts with the PROTO opcode
+            legacy = mm[:1] == pk.PROTO
+            if legacy:
+                data = pk.loads(mm)
+            else:
+                frames = self._iter_frames(mm)
+                header = next(frames, None)
+                if header is None:
+                    raise EOFError("Truncated header frame")
+                offset, length = header
+                data = pk.loads(mm[offset:offset + length])
+
+            if not isinstance(data, dict) or 'metadata' not in data or (legacy and 'employees' not in data):
+                raise ValueError("Invalid database file format: Missing required keys.")
+                
+            metadata = data['metadata']
+            _creation_date = metadata['creation_date']
+            self.CREATION_DATE = dt.strptime(_creation_date, "%Y-%m-%d")
+            self.COMPANY_NAME = metadata['company_name']
+            self.EMAIL_SUFFIX = metadata['email_suffix']
+            self.MAX_EMPLOYEES = metadata['max_employees']
+
+            if legacy:
+                return data, True
+            if data.get('version') != self.FORMAT_VERSION:
+                raise ValueError(f"Invalid database file format: Unsupported version {data.get('version')!r}.")
+
+            # Only index where each record is; records are read on first access
+            self.employees = {}
+            self._frame_sizes = {}
+            self._file_size = self._header_size = self.FRAME_HEADER.size + length
+            self._live_size = 0
+            for offset, length in frames:
+                op, id_ = self.RECORD_HEADER.unpack_from(mm, offset)
+                if op == self.OP_PUT:
+                    self._offsets[id_] = (offset + self.RECORD_HEADER.size, length - self.RECORD_HEADER.size)
+                elif op == self.OP_REMOVE:
+                    self._offsets.pop(id_, None)
+                else:
+                    raise ValueError(f"Invalid database file format: Unknown operation {op!r}.")
+                self._track_frame(op, id_, self.FRAME_HEADER.size + length)
+
+            complete = self._file_size == len(mm)
+            if not complete:
+                # A crash while appending leaves a partial frame at the end of the log. Only the change
+                # being written is lost, so it is cut off and new frames are appended after the last complete one
+                logging.warning(f"Discarding {len(mm) - self._file_size} bytes of a partially written frame at the end of {self.FILE_PATH}.")
+                mm.close()
+                os.truncate(self.FILE_PATH, self._file_size)
+                with open(self.FILE_PATH, 'rb') as file:
+                    mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmap, mm = mm, None
+            return None, complete
+        finally:
+            if mm is not None:
+                mm.close()
+
+    def _finish_loading(self, legacy_data: dict, back_up: bool = True) -> None:
+        """
+        Back up a database file that was read successfully, and convert it if it was written before the frame log
+
+        Args:
+            legacy_data (dict): The unpickled database returned by _read_database, or None
+            back_up (bool, optional): Whether to replace the backup with the file. Defaults to True
+
+        Raises:
+            ValueError: If the file holds a value that cannot be converted to its field's type
+            OSError: If the file cannot be rewritten in the current format
+        """
+        if back_up:
+            self._create_backup()
+        if legacy_data is not None:
+            # The file was read successfully, so a failed conversion must leave it as it is rather
+            # than fall through to initializing an empty database over it
+            try:
+                self.employees = self._read_legacy_employees(legacy_data)
+            except ValueError as e:
+                logging.critical(f"Cannot convert {self.FILE_PATH} to the current frame log format: {e}. The file was left unchanged.")
+                raise
+            logging.info(f"Converting {self.FILE_PATH} to the current frame log format. The original file is kept at {self.FILE_PATH}.legacy.")
+            shutil.copy2(self.FILE_PATH, f"{self.FILE_PATH}.legacy")
+            if not self._write_snapshot():
+                raise OSError(f"Cannot convert {self.FILE_PATH} to the current frame log format. The file was left unchanged.")
+
+        self._name_index = None
+        self._indexes = None
+        self._columns = None
+        logging.info(f"Database loaded successfully from {self.FILE_PATH}")
+
+    def _create_backup(self) -> None:
+        """
+        Replace the backup with the current database file
+
+        Only called once the file has loaded successfully, so the backup always holds the last readable version.
+        The backup is a hard link to the file where the file system allows it, and its current size is recorded
+        in a ".bak.size" file: the database file is only ever appended to or replaced, never rewritten in place,
+        so those first bytes stay the backup while later changes are appended to the shared file
+        """
+        backup_file_path = f"{self.FILE_PATH}.bak"
+        size = os.path.getsize(self.FILE_PATH)
+        try:
+            os.unlink(backup_file_path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(self.FILE_PATH, backup_file_path)
+        except OSError:
+            shutil.copy2(self.FILE_PATH, backup_file_path)
+
+        size_file_path = f"{backup_file_path}.size"
+        with open(f"{size_file_path}.tmp", 'w') as file:
+            file.write(str(size))
+        os.replace(f"{size_file_path}.tmp", size_file_path)
+        logging.info(f"Backup created at {backup_file_path}.")
+
+    def _backup_size(self, backup_file_path: str) -> int:
+        """
+        Read how many bytes at the start of the backup file make up the backup
+
+        Args:
+            backup_file_path (str): The path of the backup file
+
+        Returns:
+            int: The recorded size, or the size of the whole file if none was recorded
+        """
+        file_size = os.path.getsize(backup_file_path)
+        try:
+            with open(f"{backup_file_path}.size") as file:
+                return min(int(file.read()), file_size)
+        except (OSError, ValueError):
+            return file_size
+
+    def _set_aside_unreadable_file(self) -> None:
+        """
+        Move a database file that failed to load to a ".corrupt" file, so restoring the backup or
+        initializing an empty database never overwrites it
+
+        Raises:
+            OSError: If the file cannot be moved, in which case it is left where it is
+        """
+        self.close()
+        corrupt_file_path = f"{self.FILE_PATH}.corrupt"
+        try:
+            os.replace(self.FILE_PATH, corrupt_file_path)
+        except OSError as e:
+            logging.critical(f"Error moving unreadable database file: {e}. The file was left unchanged.")
+            raise
+        logging.warning(f"Unreadable database file moved to {corrupt_file_path}.")
+
+    def _iter_frames(self, buffer):
+        """
+        Iterate over the frames stored in a database file buffer
+
+        Iteration stops at a frame that was only partly written, which can only be the last one, leaving the
+        caller to discard it. That is a frame whose header or body runs past the end of the buffer, a last
+        frame whose body fails its checksum, or a tail of zero bytes left by a file system extending the file
+
+        Args:
+            buffer: A bytes-like view of the database file
+
+        Yields:
+            tuple: The offset and length of the body of each complete frame
+
+        Raises:
+            ValueError: If a frame header, or the body of a frame other than the last, fails its checksum
+        """
+        offset = 0
+        end = len(buffer)
+        while offset + self.FRAME_HEADER.size <= end:
+            length, length_crc, body_crc = self.FRAME_HEADER.unpack_from(buffer, offset)
+            if zlib.crc32(self.FRAME_LENGTH.pack(length)) != length_crc:
+                if not bytes(buffer[offset:end]).strip(b'\x00'):
+                    return
+                raise ValueError(f"Invalid database file format: Corrupted frame header at offset {offset}.")
+            start = offset + self.FRAME_HEADER.size
+            if start + length > end:
+                return
+            if zlib.crc32(buffer[start:start + length]) != body_crc:
+                if start + length == end:
+                    return
+                raise ValueError(f"Invalid database file format: Corrupted frame at offset {offset}.")
+            yield start, length
+            offset = start + length
+
+    def _frame_header(self, *parts: bytes) -> bytes:
+        """
+        Build the header of a frame
+
+        Args:
+            *parts (bytes): The pieces making up the body of the frame, in order
+
+        Returns:
+            bytes: The header, holding the length of the body and the checksums of the length and the body
+        """
+        length = 0
+        body_crc = 0
+        for part in parts:
+            length += len(part)
+            body_crc = zlib.crc32(part, body_crc)
+        return self.FRAME_HEADER.pack(length, zlib.crc32(self.FRAME_LENGTH.pack(length)), body_crc)
+
+    def _read_legacy_employees(self, data: dict) -> dict:
+        """
+        Read every employee record from a database file written before the frame log
+
+        Values that cannot be converted to their field's type are replaced with the field's entry in MISSING_VALUES
+
+        Args:
+            data (dict): The unpickled database
+
+        Returns:
+            dict: The employee records keyed by their 16-byte ID
+
+        Raises:
+            ValueError: If a record holds a value that cannot be converted to the type of a field with no MISSING_VALUES entry
+        """
+        employees = {}
+        for id_, employee in data['employees'].items():
+            id_ = self._normalize_id(id_)
+            employee['id'] = id_
+            for field, cast in self.FIELD_TYPES.items():
+                if field not in employee:
+                    continue
+                try:
+                    employee[field] = cast(employee[field])
+                except (ValueError, TypeError):
+                    if field not in self.MISSING_VALUES:
+                        raise ValueError(f"Employee {id_.hex()}: Invalid value {employee[field]!r} for field '{field}'")
+                    logging.warning(f"Employee {id_.hex()}: Invalid value {employee[field]!r} for field '{field}' replaced with {self.MISSING_VALUES[field]!r}.")
+                    employee[field] = self.MISSING_VALUES[field]
+            employees[id_] = employee
+        return employees
+
+    def _track_frame(self, op: bytes, id_: bytes, size: int) -> None:
+        """
+        Account for a frame appended to the log when deciding whether to compact it
+
+        Args:
+            op (bytes): The operation stored in the frame
+            id_ (bytes): The unique identifier of the affected employee
+            size (int): The size in bytes of the frame
+        """
+        self._file_size += size
+        if op == self.OP_PUT:
+            # The new version of the record supersedes the previous frame
+            self._live_size += size - self._frame_sizes.get(id_, 0)
+            self._frame_sizes[id_] = size
+        elif op == self.OP_REMOVE:
+            self._live_size -= self._frame_sizes.pop(id_, 0)
+
+    @property
+    def employees(self) -> dict:
+        """
+        dict: All employee records keyed by their 16-byte ID, reading any not yet loaded from the database file
+        """
+        if self._offsets:
+            for id_ in sorted(self._offsets, key=self._offsets.get):
+                self._read_one(id_)
+        return self._employees
+
+    @employees.setter
+    def employees(self, employees: dict) -> None:
+        self._employees = employees
+        self._offsets = {}
+
+    def _read_one(self, id_: bytes) -> dict:
+        """
+        Retrieve a single employee record, reading it from the database file on first access
+
+        Records read are kept in memory, as they may be modified in place
+
+        Args:
+            id_ (bytes): The unique identifier of the employee
+
+        Returns:
+            dict: The employee's data if found, None otherwise
+        """
+        employee = self._employees.get(id_)
+        if employee is None and id_ in self._offsets:
+            if self._mmap is None:
+                with open(self.FILE_PATH, 'rb') as file:
+                    self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            offset, _ = self._offsets.pop(id_)
+            employee = self._decode_employee(id_, self._mmap, offset)
+            self._employees[id_] = employee
+        return employee
+
+    def _encode_employee(self, employee: dict) -> bytes:
+        """
+        Encode an employee record in the EMPLOYEE_LAYOUT format
+
+        Args:
+            employee (dict): The employee's data
+
+        Returns:
+            bytes: The encoded record
+
+        Raises:
+            struct.error: If a field does not fit in the layout
+        """
+        nombre = employee['nombre'].encode()
+        apellido = employee['apellido'].encode()
+        email = employee['email'].encode()
+        return self.EMPLOYEE_LAYOUT.pack(
+            employee['departamento'], employee['sueldo'], employee['fecha'],
+            len(nombre), len(apellido), len(email)
+        ) + nombre + apellido + email
+
+    def _decode_employee(self, id_: bytes, buffer, offset: int) -> dict:
+        """
+        Decode an employee record in the EMPLOYEE_LAYOUT format
+
+        Args:
+            id_ (bytes): The unique identifier of the employee
+            buffer: A bytes-like view of the database file
+            offset (int): The offset of the record in the buffer
+
+        Returns:
+            dict: The employee's data
+        """
+        departamento, sueldo, fecha, nombre_length, apellido_length, email_length = self.EMPLOYEE_LAYOUT.unpack_from(buffer, offset)
+        start = offset + self.EMPLOYEE_LAYOUT.size
+        apellido_start = start + nombre_length
+        email_start = apellido_start + apellido_length
+        return {
+            'id': id_,
+            'nombre': str(buffer[start:apellido_start], 'utf-8'),
+            'apellido': str(buffer[apellido_start:email_start], 'utf-8'),
+            'departamento': departamento,
+            'sueldo': sueldo,
+            'fecha': fecha,
+            'email': str(buffer[email_start:email_start + email_length], 'utf-8')
+        }
+
+    def _coerce_employee(self, employee: dict) -> dict:
+        """
+        Convert the fields of an employee record to the types in FIELD_TYPES
+
+        Records imported from a snapshot written by export hold every field as a string
+
+        Args:
+            employee (dict): The employee's data
+
+        Returns:
+            dict: The same record, converted in place
+
+        Raises:
+            ValueError: If a field holds a value that cannot be converted to its type
+        """
+        for field, cast in self.FIELD_TYPES.items():
+            if field in employee:
+                try:
+                    employee[field] = cast(employee[field])
+                except (ValueError, TypeError) as e:
+                    raise ValueError(f"Invalid value {employee[field]!r} for field '{field}'") from e
+        return employee
+
+    def _employee_count(self) -> int:
+        """
+        Count the employees in the database without reading their records
+
+        Returns:
+            int: The number of employees
+        """
+        return len(self._employees) + len(self._offsets)
+    
+    def _ensure_indexes(self) -> None:
+        """
+        Build the email suffix and equality indexes if they have not been built since the database was loaded
+        """
+        if self._indexes is None:
+            self._rebuild_indexes()
+
+    def _rebuild_indexes(self) -> None:
+        """
+        Rebuild the index of the highest email suffix issued for each email name, and the equality indexes of INDEXED_FIELDS
+
+        The email name is read from the email itself rather than the current first name and surname, which may have been
+        modified since the email was issued
+        """
+        self._name_index = {}
+        self._indexes = {field: {} for field in self.INDEXED_FIELDS}
+        for id_, employee in self.employees.items():
+            _match = self.EMAIL_SUFFIX_PATTERN.match(employee['email'].lower())
+            if _match:
+                _key, _suffix = _match.group(1), int(_match.group(2) or 0)
+                self._name_index[_key] = max(self._name_index.get(_key, 0), _suffix)
+            self._index_employee(id_, employee)
+
+    def _index_employee(self, id_: bytes, employee: dict) -> None:
+        """
+        Add an employee to the equality indexes
+
+        Args:
+            id_ (bytes): The unique identifier of the employee
+            employee (dict): The employee's data
+        """
+        if self._indexes is None:
+            return
+        for field, index in self._indexes.items():
+            index.setdefault(self._cast_field(field, employee[field]), set()).add(id_)
+
+    def _unindex_employee(self, id_: bytes, employee: dict) -> None:
+        """
+        Remove an employee from the equality indexes
+
+        Args:
+            id_ (bytes): The unique identifier of the employee
+            employee (dict): The employee's data as it was indexed
+        """
+        if self._indexes is None:
+            return
+        for field, index in self._indexes.items():
+            value = self._cast_field(field, employee[field])
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(id_)
+                if not ids:
+                    del index[value]
     
     def generate_metadata(self) -> dict:
 
@@ -167,7 +1000,7 @@ class EmployeeDatabase:
             'email_suffix': self.EMAIL_SUFFIX,
             'creation_date': self.CREATION_DATE.strftime("%Y-%m-%d"),
             'max_employees': self.MAX_EMPLOYEES,
-            'total_employees': len(self.employees)
+            'total_employees': self._employee_count()
         }
     
     def restore_from_backup(self) -> bool:
@@ -179,7 +1012,7 @@ class EmployeeDatabase:
             bool: True if the backup restoration is successful, False otherwise
 
         Process:
-            - If a backup file exists, it copies the backup to replace the current database file
+            - If a backup file exists, it copies the backup, cut to its recorded size, to replace the current database file
             - Attempts to reload the database from the restored backup
             - If successful, logs a success message and returns True
             - If an error occurs during the restoration or no backup file exists, logs the issue and returns False
@@ -189,9 +1022,18 @@ class EmployeeDatabase:
         
         if os.path.exists(backup_file_path):
             try:
-                shutil.copy2(backup_file_path, self.FILE_PATH)
+                self.close()
+                # The backup may be hard linked to the database file, so it is copied to a new file
+                # which replaces the database file rather than being written over it
+                tmp_file_path = f"{self.FILE_PATH}.tmp"
+                shutil.copy2(backup_file_path, tmp_file_path)
+                os.truncate(tmp_file_path, self._backup_size(backup_file_path))
+                os.replace(tmp_file_path, self.FILE_PATH)
+                # Read the restored file directly rather than through _load_data, which would try
+                # to restore the same backup again if it is unreadable too
+                legacy_data, complete = self._read_database()
+                self._finish_loading(legacy_data, back_up=complete)
                 logging.info("Backup restored successfully.")
-                self._load_data()
                 return True
             except Exception as e:
                 logging.error(f"Error restoring from backup: {e}")
@@ -200,85 +1042,308 @@ class EmployeeDatabase:
             logging.warning("No backup file found to restore.")
             return False
     
-    def _update_file(self) -> bool:
+    def export(self, path: str, fmt: str = 'msgpack') -> bool:
+        """
+        Write a portable snapshot of the database that can be read without Python or pickle
+
+        The snapshot holds the metadata and the employees keyed by their ID, with each record's fields,
+        the ID included, as strings in the form returned by format_employee
+
+        Args:
+            path (str): The path of the file to write
+            fmt (str, optional): One of EXPORT_FORMATS. Defaults to 'msgpack'
+
+        Returns:
+            bool: True if the snapshot was written successfully, False otherwise
+        """
+        if msgspec is None:
+            logging.error("Exporting the database requires msgspec.")
+            return False
+        if fmt not in self.EXPORT_FORMATS:
+            logging.error(f"Invalid export format: {fmt}")
+            return False
+
+        encoder = msgspec.msgpack.Encoder() if fmt == 'msgpack' else msgspec.json.Encoder()
+        try:
+            employees = (self.format_employee(employee) for employee in self.employees.values())
+            data = {
+                'metadata': self.generate_metadata(),
+                'employees': {employee['id']: employee for employee in employees}
+            }
+            encoded = encoder.encode(data)
+            with open(path, 'wb') as file:
+                file.write(encoded)
+        except Exception as e:
+            logging.error(f"Error exporting database: {e}")
+            return False
+
+        logging.info(f"Database exported to {path}.")
+        return True
 
+    def import_(self, path: str, fmt: str = 'msgpack') -> bool:
         """
-        Update the employee database file with the current data
+        Replace the employees in the database with those of a snapshot written by export
 
-        This method serializes the current employee data and metadata to the specified file path
+        The company name, email suffix and other settings of this database are kept. Each record must hold
+        exactly the employee fields, with its ID matching its key and values that fit the database file
+
+        Args:
+            path (str): The path of the snapshot file
+            fmt (str, optional): One of EXPORT_FORMATS. Defaults to 'msgpack'
+
+        Returns:
+            bool: True if the employees were imported successfully, False otherwise
+        """
+        if msgspec is None:
+            logging.error("Importing a database requires msgspec.")
+            return False
+        if fmt not in self.EXPORT_FORMATS:
+            logging.error(f"Invalid import format: {fmt}")
+            return False
+
+        decoder = msgspec.msgpack.Decoder(dict) if fmt == 'msgpack' else msgspec.json.Decoder(dict)
+        try:
+            with open(path, 'rb') as file:
+                data = decoder.decode(file.read())
+            if 'employees' not in data:
+                raise ValueError("Invalid snapshot format: Missing required keys.")
+            fields = {'id', *self.FIELD_TYPES}
+            employees = {}
+            for key, employee in data['employees'].items():
+                if not isinstance(employee, dict) or employee.keys() != fields:
+                    raise ValueError(f"Invalid snapshot format: Employee {key} must have exactly the fields {sorted(fields)}.")
+                # Parsed as a UUID so that a key of the wrong length is rejected rather than padded on disk
+                id_ = uuid.UUID(key).bytes
+                if uuid.UUID(employee['id']).bytes != id_:
+                    raise ValueError(f"Invalid snapshot format: Employee {key} holds the ID {employee['id']}.")
+                employee = self._coerce_employee({**employee, 'id': id_})
+                # Values out of range of the record layout, such as overlong names, fail to encode
+                self._encode_employee(employee)
+                employees[id_] = employee
+        except Exception as e:
+            logging.error(f"Error importing database: {e}")
+            return False
+
+        if len(employees) > self.MAX_EMPLOYEES:
+            logging.error("Snapshot has more employees than the maximum allowed.")
+            return False
+
+        _previous = self._employees, self._offsets
+        self.employees = employees
+        if not self._write_snapshot():
+            logging.error("Error importing database.")
+            self._employees, self._offsets = _previous
+            return False
+
+        self._rebuild_indexes()
+        self._columns = None
+        logging.info(f"Database imported from {path}.")
+        return True
+
+    def _write_snapshot(self) -> bool:
+
+        """
+        Rewrite the employee database file as a compact snapshot of the current data
+
+        The snapshot is a header frame followed by one OP_PUT frame per employee,
+        discarding the history of removed and modified records accumulated in the log.
+        It is written to a temporary file which then replaces the database file, so the
+        previous contents stay intact (and any backup hard linked to them) if writing fails
+
+        Returns:
+            bool: True if the file was written successfully, False otherwise
+        """
+
+        employees = self.employees
+        self.close()
+        header = pk.dumps({'version': self.FORMAT_VERSION, 'metadata': self.generate_metadata()}, protocol=self.PICKLE_PROTOCOL)
+        file_size = header_size = self.FRAME_HEADER.size + len(header)
+        frame_sizes = {}
+        tmp_file_path = f"{self.FILE_PATH}.tmp"
+        try:
+            with open(tmp_file_path, 'wb', buffering=self.IO_BUFFER_SIZE) as file:
+                file.write(self._frame_header(header))
+                file.write(header)
+                for id_, employee in employees.items():
+                    buf = self._encode_employee(employee)
+                    record_header = self.RECORD_HEADER.pack(self.OP_PUT, id_)
+                    file.write(self._frame_header(record_header, buf))
+                    file.write(record_header)
+                    file.write(buf)
+                    frame_sizes[id_] = self.FRAME_HEADER.size + self.RECORD_HEADER.size + len(buf)
+                    file_size += frame_sizes[id_]
+                # Always synced, whatever the durability, as a crash after the replace would otherwise lose every record
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_file_path, self.FILE_PATH)
+        except Exception as e:
+            logging.error(f"Error writing snapshot: {e}")
+            return False
+
+        self._file_size = self._bulk_start_size = file_size
+        self._header_size = header_size
+        self._live_size = file_size - header_size
+        self._frame_sizes = frame_sizes
+        logging.info("Snapshot written correctly.")
+        return True
+
+    def _append_op(self, op: bytes, id_: bytes, employee: dict = None) -> bool:
+
+        """
+        Append a single operation to the employee database file
+
+        Only the changed record is serialized, so the cost of a mutation does not grow with the size of the database.
+        The log is compacted into a fresh snapshot once it exceeds COMPACTION_RATIO times the size of the live data
+
+        Args:
+            op (bytes): The operation, either OP_PUT or OP_REMOVE
+            id_ (bytes): The unique identifier of the affected employee
+            employee (dict, optional): The full employee record for OP_PUT
 
         Returns:
             bool: True if the file was updated successfully, False otherwise
         """
 
-        _metadata = self.generate_metadata()
-        _data = {
-            'metadata': _metadata,
-            'employees': self.employees
-        }
         try:
-            with open(self.FILE_PATH, 'wb') as file:
-                pk.dump(_data, file)
-            logging.info("File updated correctly.")
-            return True
+            buf = self._encode_employee(employee) if op == self.OP_PUT else b''
+            if self._log_file is None:
+                self._log_file = open(self.FILE_PATH, 'ab', buffering=self.IO_BUFFER_SIZE)
+            record_header = self.RECORD_HEADER.pack(op, id_)
+            self._log_file.write(self._frame_header(record_header, buf))
+            self._log_file.write(record_header)
+            self._log_file.write(buf)
+            if not self._bulk_depth:
+                self._log_file.flush()
+                if self.DURABILITY == 'strict':
+                    os.fsync(self._log_file.fileno())
         except Exception as e:
             logging.error(f"Error updating file: {e}")
+            self._discard_partial_frame()
+            return False
+
+        self._track_frame(op, id_, self.FRAME_HEADER.size + self.RECORD_HEADER.size + len(buf))
+        logging.info("File updated correctly.")
+
+        if not self._bulk_depth:
+            self._compact_if_needed()
+        return True
+
+    def _compact_if_needed(self) -> None:
+        """
+        Rewrite the log as a snapshot once it exceeds COMPACTION_RATIO times the size of the live data
+        """
+        if self._file_size > self.COMPACTION_RATIO * (self._header_size + self._live_size):
+            # The operations are already in the log, so a failed compaction is not an error
+            self._write_snapshot()
+
+    def _discard_partial_frame(self) -> None:
+        """
+        Truncate the database file to its last complete frame after a failed append
+
+        This keeps the log replayable, so the in-memory records can be rolled back
+        without reloading the whole file
+        """
+        try:
+            self.close()
+        except OSError:
+            pass
+        try:
+            os.truncate(self.FILE_PATH, self._file_size)
+        except OSError as e:
+            logging.error(f"Error truncating partial frame: {e}")
+
+    def flush(self) -> bool:
+        """
+        Write any buffered changes to the database file and sync it to disk
+
+        Returns:
+            bool: True if the file was synced successfully, False otherwise
+        """
+        try:
+            if self._log_file is not None:
+                self._log_file.flush()
+                os.fsync(self._log_file.fileno())
+            else:
+                fd = os.open(self.FILE_PATH, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            logging.error(f"Error syncing file: {e}")
             return False
+        return True
+
+    def close(self) -> None:
+        """
+        Sync buffered changes to disk, then close the append handle and the memory map of the database file, if open
+
+        Records not yet read are still available, as the file is mapped again on the next access
+        """
+        if self._mmap is not None:
+            mm, self._mmap = self._mmap, None
+            mm.close()
+        if self._log_file is not None:
+            log_file, self._log_file = self._log_file, None
+            try:
+                log_file.flush()
+                os.fsync(log_file.fileno())
+            finally:
+                log_file.close()
     
-    def _generate_random_employee_data(self, _id: uuid.UUID) -> dict:
+    def _generate_random_employee_data(self, _id: bytes) -> dict:
 
         """
         Generate a dictionary with randomized employee data, ensuring unique email addresses
 
-        This method checks for existing employees with the same first name and surname,
-        and appends a numerical suffix to the email if necessary to avoid duplicates
+        This method looks up the highest email suffix issued for the same email name, made of the first name and surname,
+        and appends the next numerical suffix to the email if necessary to avoid duplicates
+
+        The ID is not checked against the database: callers pass a fresh uuid.uuid4, whose 122 random bits
+        make a collision negligible
 
         Args:
-            _id (uuid.UUID): A unique identifier for the employee
+            _id (bytes): The 16-byte unique identifier of the employee
 
         Returns:
             dict: A dictionary containing the following employee information:
-                - "id" (uuid.UUID): The unique identifier of the employee
+                - "id" (bytes): The 16-byte unique identifier of the employee
                 - "nombre" (str): The employee's first name
                 - "apellido" (str): The employee's surname
-                - "departamento" (str): The employee's department number (randomly chosen between 1 and 10)
-                - "sueldo" (str): The employee's salary (formatted as a string with 2 decimal places)
-                - "fecha" (str): The employee's birth date in "YYYY-MM-DD" format
+                - "departamento" (int): The employee's department number (randomly chosen between 1 and 10)
+                - "sueldo" (float): The employee's salary
+                - "fecha" (int): The employee's birth date as a proleptic Gregorian ordinal
                 - "email" (str): The employee's unique email address
-        
-        Raises:
-            logging.error: If the employee ID already exists in the database
         """
 
-        if _id in self.employees:
-            logging.error(f"Error generating employee data: ID {_id} already exists.")
-            return {}
-        
         _name = names.get_first_name()
         _surname = names.get_last_name()
-        _department = random.randint(1, 10)
-        _salary = random.randint(10000, 20000)
-        _year = random.randint(dt.now().year-65, dt.now().year-18)
-        _month = random.randint(1, 12)
-        _, _days_in_month = calendar.monthrange(_year, _month)
-        _day = random.randint(1, _days_in_month)
-        _date = dt(_year, _month, _day).strftime("%Y-%m-%d")
-
-        _existing_emails = [employee['email'] for employee in self.employees.values() if employee['nombre'].lower() == _name.lower() and employee['apellido'].lower() == _surname.lower()]
-        if not _existing_emails:
-            _email = f"{_name}.{_surname}@{self.EMAIL_SUFFIX}.com"
+        _department = self._rng.randint(1, 10)
+        _salary = self._rng.randint(10000, 20000)
+        _year = self._rng.randint(self._current_year-65, self._current_year-18)
+        _month = self._rng.randint(1, 12)
+        _leap = _year % 4 == 0 and (_year % 100 != 0 or _year % 400 == 0)
+        _day = self._rng.randint(1, self.DAYS_IN_MONTH[_leap][_month - 1])
+        _date = dt(_year, _month, _day).toordinal()
+
+        self._ensure_indexes()
+        _key = f"{_name}.{_surname}".lower()
+        if _key not in self._name_index:
+            _email = f"{_key}@{self.EMAIL_SUFFIX}.com"
+            self._name_index[_key] = 0
         else:
-            # Ensures no duplicates even after deletions
-            existing_suffixes = [int(email.split(_surname)[-1].split('@')[0]) for email in _existing_emails if email.split(_surname)[-1].split('@')[0].isdigit()]
-            highest_suffix = max(existing_suffixes) if existing_suffixes else 0
-            _email = f"{_name}.{_surname}{highest_suffix + 1}@{self.EMAIL_SUFFIX}.com"
+            # Suffixes are not reused while the database is open, even after deletions. The index is rebuilt from the
+            # remaining emails on reload, so the suffix of a removed employee may be issued again, but never one in use
+            _suffix = self._name_index[_key] + 1
+            self._name_index[_key] = _suffix
+            _email = f"{_key}{_suffix}@{self.EMAIL_SUFFIX}.com"
 
         return {
             "id": _id,
             "nombre": _name,
             "apellido": _surname,
-            "departamento": str(_department),
-            "sueldo": f"{_salary:.2f}",
+            "departamento": _department,
+            "sueldo": float(_salary),
             "fecha": _date,
             "email": _email.lower()
         }
@@ -301,49 +1366,118 @@ class EmployeeDatabase:
             bool: True if the employee is added successfully, False otherwise
         """
 
-        if len(self.employees) >= self.MAX_EMPLOYEES:
+        if self._employee_count() >= self.MAX_EMPLOYEES:
             logging.warning("Maximum number of employees reached.")
             return False
         
-        _id = uuid.uuid4()
+        _id = uuid.uuid4().bytes
         _employee = self._generate_random_employee_data(_id)
-        self.employees[_id] = _employee
+        self._employees[_id] = _employee
 
-        result = self._update_file()         
+        result = self._append_op(self.OP_PUT, _id, _employee)
         if not result:
             logging.error(f"Error adding new employee.")
-            self._load_data() # Revert dictionary to file contents
+            del self._employees[_id] # Revert dictionary to file contents
             return False
         
-        logging.info(f"Employee with ID {_id} added correctly.")
+        self._index_employee(_id, _employee)
+        if self._columns is not None:
+            self._columns.add(_id, _employee)
+        logging.info(f"Employee with ID {_id.hex()} added correctly.")
         return True
     
-    def remove_employee(self, id_: uuid.UUID) -> bool:
+    def add_employees_with_random_data(self, count: int) -> int:
+
+        """
+        Add several new employees with randomly generated data to the database in a single write
+
+        Args:
+            count (int): The number of employees to add
+
+        Returns:
+            int: The number of employees added, which is lower than count if the maximum number of employees is reached
+        """
+
+        _initial_count = self._employee_count()
+        with self.bulk_update():
+            for _ in range(count):
+                if not self.add_employee_with_random_data():
+                    break
+
+        return max(self._employee_count() - _initial_count, 0)
+
+    @contextlib.contextmanager
+    def bulk_update(self):
+
+        """
+        Group the modifications made inside a with block into a single write to the database file
+
+        Changes are applied in memory immediately, but are only flushed to the file when the outermost block exits.
+        If that write fails, the whole group is discarded and the database is reloaded from the file
+
+        Yields:
+            EmployeeDatabase: This database
+        """
+
+        if not self._bulk_depth:
+            self._bulk_start_size = self._file_size
+        self._bulk_depth += 1
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            if not self._bulk_depth:
+                self._end_bulk_update()
+
+    def _end_bulk_update(self) -> None:
+        """
+        Flush the changes made inside bulk_update blocks to the database file
+        """
+        try:
+            if self._log_file is not None:
+                self._log_file.flush()
+                os.fsync(self._log_file.fileno())
+        except Exception as e:
+            logging.error(f"Error updating file: {e}")
+            self._file_size = self._bulk_start_size
+            self._discard_partial_frame()
+            self._load_data()
+            return
+
+        self._compact_if_needed()
+    
+    def remove_employee(self, id_: uuid.UUID | bytes | str) -> bool:
         """
         Remove an employee from the database by their ID
 
         Args:
-            id_ (uuid.UUID): The unique identifier of the employee to be removed
+            id_ (uuid.UUID | bytes | str): The unique identifier of the employee to be removed
 
         Returns:
             bool: True if the employee was removed successfully, False otherwise
         """
-        if len(self.employees) == 0:
+        if self._employee_count() == 0:
             print("Employee database is empty")
             return False
         
-        if id_ in self.employees:
-            del self.employees[id_]
-            result = self._update_file()         
+        key = self._normalize_id(id_)
+        if self.employee_exists(key):
+            id_ = key
+            _employee = self._read_one(id_)
+            del self._employees[id_]
+            result = self._append_op(self.OP_REMOVE, id_)
             if not result:
                 logging.error(f"Failed to remove employee.")
-                self._load_data()
+                self._employees[id_] = _employee
                 return False
             
-            logging.info(f"Employee with ID {id_} removed correctly.")
+            self._unindex_employee(id_, _employee)
+            if self._columns is not None:
+                self._columns.remove(id_)
+            logging.info(f"Employee with ID {id_.hex()} removed correctly.")
             return True
         else:
-            logging.error(f"Error removing employee: ID {id_} not found.")
+            logging.error(f"Error removing employee: ID {id_!r} not found.")
             return False
     
     def reset_employees(self) -> bool:
@@ -353,40 +1487,69 @@ class EmployeeDatabase:
         Returns:
             bool: True if the reset was successful, False otherwise
         """
+        if self._employee_count() == 0:
+            return True # Already empty
+
+        _previous = self._employees, self._offsets
         self.employees = {}
-        result = self._update_file()
+        result = self._write_snapshot()
         if not result:
             logging.error("Error resetting employee database.")
-            self._load_data()
+            self._employees, self._offsets = _previous
             return False
 
+        self._rebuild_indexes()
+        self._columns = None
         logging.info("Employee database reset successfully.")
         return True
     
-    def employee_exists(self, id_: uuid.UUID) -> bool:
+    def employee_exists(self, id_: uuid.UUID | bytes | str) -> bool:
         """
         Check if an employee exists in the database by their ID
 
         Args:
-            id_ (uuid.UUID): The unique identifier of the employee
+            id_ (uuid.UUID | bytes | str): The unique identifier of the employee
 
         Returns:
             bool: True if the employee exists, False otherwise
         """
-        return id_ in self.employees
+        id_ = self._normalize_id(id_)
+        return id_ in self._employees or id_ in self._offsets
     
+    def _normalize_id(self, id_: uuid.UUID | bytes | str) -> bytes:
+        """
+        Convert an employee ID to the 16-byte form used as a key in the database
+
+        Args:
+            id_ (uuid.UUID | bytes | str): The unique identifier of the employee, as a UUID, its raw bytes
+                                           or its string form, as returned by format_employee
+
+        Returns:
+            bytes: The raw bytes of the identifier, or None if it is not a valid ID
+        """
+        if isinstance(id_, uuid.UUID):
+            return id_.bytes
+        if isinstance(id_, bytes):
+            return id_
+        if isinstance(id_, str):
+            try:
+                return uuid.UUID(id_).bytes
+            except ValueError:
+                return None
+        return None
+
     @property
     def read_only_fields(self) -> list:
         return ['id', 'fecha', 'email']
     
-    def modify_employee_field(self, id_: uuid.UUID, field_name: str, field_value: str) -> bool:
+    def modify_employee_field(self, id_: uuid.UUID | bytes | str, field_name: str, field_value: str) -> bool:
         """
         Modify a specific field of an employee in the database
 
         Args:
-            id_ (uuid.UUID): The unique identifier of the employee
+            id_ (uuid.UUID | bytes | str): The unique identifier of the employee
             field_name (str): The name of the field to be updated
-            field_value (str): The new value to set for the specified field
+            field_value (str): The new value to set for the specified field, as a string or a value of the field's type
 
         Returns:
             bool: True if the field was updated successfully, False otherwise
@@ -395,41 +1558,80 @@ class EmployeeDatabase:
             logging.error("Field is read-only")
             return False
         
-        if id_ in self.employees:
-            if field_name in self.employees[id_]:
-                self.employees[id_][field_name] = field_value
+        if field_name in self.FIELD_TYPES:
+            try:
+                field_value = self.FIELD_TYPES[field_name](field_value)
+            except (ValueError, TypeError):
+                logging.error(f"Error updating field: Invalid value '{field_value}' for field '{field_name}'.")
+                return False
+
+        key = self._normalize_id(id_)
+        _employee = self._read_one(key)
+        if _employee is not None:
+            id_ = key
+            if field_name in _employee:
+                if _employee[field_name] == field_value:
+                    return True # Nothing to write
+
+                _previous = dict(_employee)
+                _employee[field_name] = field_value
                 
-                result = self._update_file()
+                result = self._append_op(self.OP_PUT, id_, _employee)
                 if not result:
                     logging.error("Error updating field.")
-                    self._load_data()
+                    _employee[field_name] = _previous[field_name]
                     return False
                 
-                logging.info(f"Field '{field_name}' in ID {id_} updated correctly.")
+                if field_name in self.INDEXED_FIELDS:
+                    self._unindex_employee(id_, _previous)
+                    self._index_employee(id_, _employee)
+                if self._columns is not None:
+                    self._columns.update(id_, field_name, field_value)
+                logging.info(f"Field '{field_name}' in ID {id_.hex()} updated correctly.")
                 return True
             else:
                 logging.error(f"Error updating field: Invalid field name '{field_name}'.")
                 return False
         else:
-            logging.error(f"Error updating field: ID {id_} not found.")
+            logging.error(f"Error updating field: ID {id_!r} not found.")
             return False
         
-    def get_employee(self, id_: uuid.UUID) -> dict:
+    def get_employee(self, id_: uuid.UUID | bytes | str) -> dict:
         """
         Retrieve an employee's data from the database by their ID
 
         Args:
-            id_ (uuid.UUID): The unique identifier of the employee
+            id_ (uuid.UUID | bytes | str): The unique identifier of the employee
 
         Returns:
             dict: The employee's data if found, None otherwise
         """
-        if id_ in self.employees:
-            return self.employees[id_]
+        _employee = self._read_one(self._normalize_id(id_))
+        if _employee is not None:
+            return _employee
         else:
-            logging.warning(f"ID {id_} not found.")
+            logging.warning(f"ID {id_!r} not found.")
             return None
     
+    def format_employee(self, employee: dict) -> dict:
+        """
+        Convert an employee's data to strings for display
+
+        Args:
+            employee (dict): The employee's data as stored in the database
+
+        Returns:
+            dict: A copy of the employee's data with the ID as a UUID string, the salary with 2 decimal places
+                  and the birth date in "YYYY-MM-DD" format, or empty if unknown
+        """
+        return {
+            **employee,
+            "id": str(uuid.UUID(bytes=employee["id"])),
+            "departamento": str(employee["departamento"]),
+            "sueldo": f"{employee['sueldo']:.2f}",
+            "fecha": dt.fromordinal(employee["fecha"]).strftime("%Y-%m-%d") if employee["fecha"] else ""
+        }
+    
     def get_by_field(self, field_name: str, operator_: str, field_value: str) -> dict:
         """
         Retrieve a dictionary of employees that match a specified field and comparison criteria
@@ -459,17 +1661,65 @@ class EmployeeDatabase:
             logging.error(f"Field '{field_name}' does not exist.")
             return {}
         
-        converted_field_value = self._cast_str(field_value)
+        converted_field_value = self._cast_field(field_name, field_value)
+
+        # Equality on an indexed field only needs the matching IDs
+        if operator_ == '==' and field_name in self.INDEXED_FIELDS:
+            self._ensure_indexes()
+            return {
+                id_: self.employees[id_]
+                for id_ in self._indexes[field_name].get(converted_field_value, ())
+            }
+
         comparison_function = operators[operator_]
+
+        # Numeric fields are compared a whole column at a time
+        if field_name in self.COLUMN_DTYPES:
+            if self._columns is None:
+                self._columns = _EmployeeColumns(self.COLUMN_DTYPES, self.employees, self._cast_field)
+            if field_name in self._columns.columns:
+                try:
+                    ids = self._columns.select(
+                        field_name, operator_, comparison_function, converted_field_value, self.JIT_FILTER_MIN_ROWS
+                    )
+                except (ValueError, TypeError) as e:
+                    logging.error(f"Error comparing field '{field_name}': {e}")
+                    return {}
+                return {id_: self._employees[id_] for id_ in ids}
+
+        cast = self.FIELD_TYPES.get(field_name, self._cast_str)
         
-        matching_employees = {
-            id_: employee
-            for id_, employee in self.employees.items()
-            if comparison_function(self._cast_str(employee[field_name]), converted_field_value)
-        }
+        try:
+            matching_employees = {
+                id_: employee
+                for id_, employee in self.employees.items()
+                if comparison_function(cast(employee[field_name]), converted_field_value)
+            }
+        except (ValueError, TypeError) as e:
+            logging.error(f"Error comparing field '{field_name}': {e}")
+            return {}
         
         return matching_employees
     
+    def _cast_field(self, field_name: str, value: str) -> any:
+        """
+        Convert the input value to the type of the specified field
+
+        Args:
+            field_name (str): The name of the field the value belongs to
+            value (str): The input value to be converted
+
+        Returns:
+            The value converted to the field's type, or as detected by _cast_str if the field is unknown or conversion fails
+        """
+        cast = self.FIELD_TYPES.get(field_name)
+        if cast is not None:
+            try:
+                return cast(value)
+            except (ValueError, TypeError):
+                pass
+        return self._cast_str(value)
+
     def _cast_str(self, value: str) -> any:
         """
         Detect and convert the input value to the appropriate type
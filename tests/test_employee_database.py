@@ -0,0 +1,813 @@
+import os
+import uuid
+import logging
+import operator
+import pickle as pk
+
+import pytest
+
+from employee_database import EmployeeDatabase, _EmployeeColumns
+
+
+def snapshot(db: EmployeeDatabase) -> dict:
+    return {id_: dict(employee) for id_, employee in db.get_employees().items()}
+
+
+def legacy_database(path, employees: dict) -> None:
+    """
+    Write a database in the single-pickle format used before the frame log, with every field stored as a string
+    """
+    data = {
+        'metadata': {
+            'company_name': "Acme",
+            'email_suffix': "acme",
+            'creation_date': "2020-01-31",
+            'max_employees': 100,
+            'total_employees': len(employees)
+        },
+        'employees': employees
+    }
+    with open(path, 'wb') as file:
+        pk.dump(data, file)
+
+
+def legacy_employee(id_: uuid.UUID, departamento: str = "3") -> dict:
+    return {
+        "id": id_,
+        "nombre": "Ana",
+        "apellido": "Pérez",
+        "departamento": departamento,
+        "sueldo": "25000.50",
+        "fecha": "1980-05-17",
+        "email": "ana.perez@acme.com"
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "employees.db")
+
+
+def test_round_trip(path):
+    db = EmployeeDatabase(path, "Acme")
+    assert db.add_employees_with_random_data(20) == 20
+    ids = list(db.employees)
+    for id_ in ids[:5]:
+        assert db.remove_employee(id_)
+    assert db.modify_employee_field(ids[10], 'nombre', "Zed")
+    assert db.modify_employee_field(ids[11], 'sueldo', "1234.5")
+    expected = snapshot(db)
+    db.close()
+
+    reopened = EmployeeDatabase(path)
+    assert snapshot(reopened) == expected
+    assert reopened.COMPANY_NAME == "Acme"
+    assert reopened.employees[ids[10]]['nombre'] == "Zed"
+    assert reopened.employees[ids[11]]['sueldo'] == 1234.5
+
+
+def test_reopen_reads_records_lazily(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(10)
+    expected = snapshot(db)
+    db.close()
+
+    reopened = EmployeeDatabase(path)
+    id_ = next(iter(expected))
+    assert reopened.get_employee(id_) == expected[id_]
+    assert reopened.get_by_field('departamento', '>=', '1') == expected
+    assert snapshot(reopened) == expected
+
+
+def test_appends_after_reopen_keep_backup(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    db.close()
+
+    reopened = EmployeeDatabase(path)
+    backup = snapshot(reopened)
+    reopened.add_employees_with_random_data(3)
+    reopened.close()
+
+    # Appending does not copy the file away from its hard linked backup
+    assert os.path.samefile(path, f"{path}.bak")
+    assert reopened.restore_from_backup()
+    assert snapshot(reopened) == backup
+    assert snapshot(EmployeeDatabase(path)) == backup
+
+
+def test_torn_tail_is_discarded(path, caplog):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(11)
+    expected = snapshot(db)
+    db.close()
+    size = os.path.getsize(path)
+    with open(path, 'ab') as file:
+        file.write(b'\x00\x00\x01\x00P')
+
+    with caplog.at_level(logging.WARNING):
+        reopened = EmployeeDatabase(path)
+    assert "partially written frame" in caplog.text
+    assert snapshot(reopened) == expected
+    assert os.path.getsize(path) == size
+
+    assert reopened.add_employee_with_random_data()
+    reopened.close()
+    assert len(EmployeeDatabase(path).employees) == 12
+
+
+def test_truncated_record_is_discarded(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(10)
+    expected = snapshot(db)
+    db.add_employee_with_random_data()
+    db.close()
+    os.truncate(path, os.path.getsize(path) - 3)
+
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_backup_is_kept_when_a_partial_frame_is_discarded(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    db.close()
+    reopened = EmployeeDatabase(path)
+    backup = snapshot(reopened)
+    reopened.add_employees_with_random_data(2)
+    reopened.close()
+    os.truncate(path, os.path.getsize(path) - 3)
+
+    truncated = EmployeeDatabase(path)
+    assert len(truncated.employees) == 6
+    assert truncated.restore_from_backup()
+    assert snapshot(truncated) == backup
+
+
+def frame_offsets(path) -> list:
+    with open(path, 'rb') as file:
+        contents = file.read()
+    offsets = []
+    offset = 0
+    while offset < len(contents):
+        offsets.append(offset)
+        (length, _, _) = EmployeeDatabase.FRAME_HEADER.unpack_from(contents, offset)
+        offset += EmployeeDatabase.FRAME_HEADER.size + length
+    return offsets
+
+
+def test_zero_filled_tail_is_discarded(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    expected = snapshot(db)
+    db.close()
+    with open(path, 'ab') as file:
+        file.write(bytes(64))
+
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_last_frame_failing_checksum_is_discarded(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    expected = snapshot(db)
+    db.add_employee_with_random_data()
+    db.close()
+    with open(path, 'r+b') as file:
+        file.seek(-1, os.SEEK_END)
+        file.write(b'\xff')
+
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def corrupt(path, offset: int, data: bytes) -> bytes:
+    with open(path, 'rb') as file:
+        contents = file.read()
+    with open(path, 'r+b') as file:
+        file.seek(offset)
+        file.write(data)
+    return contents
+
+
+def test_corrupted_frame_length_is_not_discarded_as_torn_tail(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(55)
+    db.close()
+    corrupt(path, frame_offsets(path)[3], b'\x00\x00\xff\xff')
+    with open(path, 'rb') as file:
+        contents = file.read()
+
+    # There is no backup to restore, but the file is kept whole rather than cut at the corrupted frame
+    EmployeeDatabase(path)
+    with open(f"{path}.corrupt", 'rb') as file:
+        assert file.read() == contents
+
+
+def test_corrupted_frame_is_restored_from_backup(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(10)
+    db.close()
+    reopened = EmployeeDatabase(path)
+    expected = snapshot(reopened)
+    reopened.add_employees_with_random_data(5)
+    reopened.close()
+
+    # Corrupt the length of one appended frame and the body of another, neither of them the last
+    offsets = frame_offsets(path)
+    corrupt(path, offsets[12], b'\x00\x00\xff\xff')
+    corrupt(path, offsets[13] + EmployeeDatabase.FRAME_HEADER.size + 20, b'\xff\xff')
+
+    assert snapshot(EmployeeDatabase(path)) == expected
+    assert os.path.exists(f"{path}.corrupt")
+
+
+def test_unreadable_file_is_restored_from_backup(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    db.close()
+    reopened = EmployeeDatabase(path)
+    expected = snapshot(reopened)
+    reopened.add_employee_with_random_data()
+    reopened.close()
+    # Replaced rather than written in place, which would also corrupt the hard linked backup
+    with open(f"{path}.new", 'wb') as file:
+        file.write(b'\x00garbage')
+    os.replace(f"{path}.new", path)
+
+    restored = EmployeeDatabase(path)
+    assert snapshot(restored) == expected
+    assert os.path.exists(f"{path}.corrupt")
+
+
+def test_legacy_file_is_converted(path):
+    id_ = uuid.uuid4()
+    legacy_database(path, {id_: legacy_employee(id_)})
+
+    db = EmployeeDatabase(path)
+    employee = db.get_employee(id_)
+    assert employee['departamento'] == 3
+    assert employee['sueldo'] == 25000.5
+    assert db.format_employee(employee)['fecha'] == "1980-05-17"
+    assert db.MAX_EMPLOYEES == 100
+    db.close()
+
+    assert snapshot(EmployeeDatabase(path)) == snapshot(db)
+
+
+def test_legacy_file_with_invalid_values_is_converted(path, caplog):
+    id_ = uuid.uuid4()
+    employee = legacy_employee(id_, departamento="Sales")
+    employee['sueldo'] = "N/A"
+    employee['fecha'] = "unknown"
+    legacy_database(path, {id_: employee})
+    with open(path, 'rb') as file:
+        contents = file.read()
+
+    with caplog.at_level(logging.WARNING):
+        db = EmployeeDatabase(path)
+    assert "'Sales'" in caplog.text
+    converted = db.get_employee(id_)
+    assert converted['departamento'] == 0
+    assert converted['sueldo'] != converted['sueldo']
+    assert db.format_employee(converted)['fecha'] == ""
+    with open(f"{path}.legacy", 'rb') as file:
+        assert file.read() == contents
+
+    db.close()
+    reopened = EmployeeDatabase(path)
+    assert reopened.get_employee(id_)['departamento'] == 0
+    assert reopened.get_by_field('departamento', '==', '0') == {id_.bytes: reopened.get_employee(id_)}
+
+
+@pytest.mark.parametrize('field_name, field_value, stored', [
+    ('nombre', "Zed", "Zed"),
+    ('departamento', "4", 4),
+    ('departamento', 4, 4),
+    ('departamento', 4.0, 4),
+    ('sueldo', "1234.5", 1234.5),
+    ('sueldo', 1234, 1234.0)
+])
+def test_modify_employee_field_converts_values(path, field_name, field_value, stored):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(1)
+    id_ = next(iter(db.employees))
+
+    assert db.modify_employee_field(id_, field_name, field_value)
+    assert db.get_employee(id_)[field_name] == stored
+    assert type(db.get_employee(id_)[field_name]) is type(stored)
+
+
+@pytest.mark.parametrize('field_name, field_value', [
+    ('nombre', None),
+    ('nombre', 3),
+    ('departamento', None),
+    ('departamento', 3.7),
+    ('departamento', True),
+    ('departamento', "Sales"),
+    ('sueldo', True),
+    ('sueldo', "N/A"),
+    ('sueldo', float('inf'))
+])
+def test_modify_employee_field_rejects_invalid_values(path, field_name, field_value):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(1)
+    id_ = next(iter(db.employees))
+    expected = dict(db.get_employee(id_))
+
+    assert not db.modify_employee_field(id_, field_name, field_value)
+    assert db.get_employee(id_) == expected
+
+
+@pytest.mark.parametrize('fmt', EmployeeDatabase.EXPORT_FORMATS)
+def test_export_import_round_trip(path, tmp_path, fmt):
+    pytest.importorskip('msgspec')
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(10)
+    expected = snapshot(db)
+    export_path = str(tmp_path / f"employees.{fmt}")
+    assert db.export(export_path, fmt)
+
+    other = EmployeeDatabase(str(tmp_path / "other.db"))
+    other.add_employees_with_random_data(3)
+    assert other.import_(export_path, fmt)
+    assert snapshot(other) == expected
+    other.close()
+    assert snapshot(EmployeeDatabase(str(tmp_path / "other.db"))) == expected
+
+
+def test_import_rejects_malformed_ids(path, tmp_path):
+    msgspec = pytest.importorskip('msgspec')
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(2)
+    expected = snapshot(db)
+    employee = db.format_employee(next(iter(expected.values())))
+    export_path = str(tmp_path / "employees.json")
+    with open(export_path, 'wb') as file:
+        file.write(msgspec.json.encode({'metadata': {}, 'employees': {'ab': employee}}))
+
+    assert not db.import_(export_path, 'json')
+    assert snapshot(db) == expected
+
+
+def test_ids_are_accepted_in_any_form(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(3)
+    id_ = next(iter(db.employees))
+    string_id = db.format_employee(db.get_employee(id_))['id']
+
+    assert db.get_employee(string_id) is db.get_employee(uuid.UUID(bytes=id_))
+    assert db.get_employee(id_.hex()) is db.get_employee(id_)
+    assert db.modify_employee_field(string_id, 'nombre', "Zed")
+    assert db.get_employee(id_)['nombre'] == "Zed"
+    assert db.remove_employee(string_id)
+    assert not db.employee_exists(id_)
+
+
+@pytest.mark.parametrize('id_', ["not-a-uuid", str(uuid.uuid4()), b'\xab', 42, None])
+def test_unknown_ids_are_not_found(path, id_):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(1)
+
+    assert db.get_employee(id_) is None
+    assert not db.employee_exists(id_)
+    assert not db.remove_employee(id_)
+    assert not db.modify_employee_field(id_, 'nombre', "Zed")
+
+
+@pytest.mark.parametrize('change', [
+    {'extra': "x"},
+    {'fecha': -1},
+    {'fecha': "not a date"},
+    {'departamento': 3.5},
+    {'departamento': 1 << 70},
+    {'sueldo': "inf"},
+    {'nombre': "x" * 70000},
+    {'id': str(uuid.uuid4())}
+])
+def test_import_rejects_invalid_records(path, tmp_path, change):
+    msgspec = pytest.importorskip('msgspec')
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(2)
+    expected = snapshot(db)
+    employee = db.format_employee(next(iter(expected.values())))
+    key = employee['id']
+    employee.update(change)
+    export_path = str(tmp_path / "employees.json")
+    with open(export_path, 'wb') as file:
+        file.write(msgspec.json.encode({'metadata': {}, 'employees': {key: employee}}))
+
+    assert not db.import_(export_path, 'json')
+    assert snapshot(db) == expected
+
+
+def test_export_keys_employees_by_their_id(path, tmp_path):
+    msgspec = pytest.importorskip('msgspec')
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(3)
+    export_path = str(tmp_path / "employees.json")
+    assert db.export(export_path, 'json')
+
+    with open(export_path, 'rb') as file:
+        employees = msgspec.json.decode(file.read())['employees']
+    assert all(key == employee['id'] for key, employee in employees.items())
+    assert {uuid.UUID(key).bytes for key in employees} == set(db.employees)
+
+
+@pytest.mark.parametrize('operator_', ['==', '!=', '<', '<=', '>', '>='])
+@pytest.mark.parametrize('field_name', ['departamento', 'sueldo', 'fecha'])
+def test_compiled_filter_matches_numpy(path, field_name, operator_):
+    pytest.importorskip('numba')
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(50)
+    for id_ in list(db.employees)[::3]:
+        db.remove_employee(id_)
+    value = db.format_employee(next(iter(db.employees.values())))[field_name]
+    expected = db.get_by_field(field_name, operator_, value)
+
+    db.JIT_FILTER_MIN_ROWS = 0
+    assert db.get_by_field(field_name, operator_, value) == expected
+
+
+@pytest.fixture
+def same_name(monkeypatch):
+    import names
+    monkeypatch.setattr(names, 'get_first_name', lambda: "Ana")
+    monkeypatch.setattr(names, 'get_last_name', lambda: "Pérez")
+
+
+def test_emails_are_unique_after_renaming_and_reopening(path, same_name):
+    db = EmployeeDatabase(path, email_suffix="acme")
+    db.add_employees_with_random_data(2)
+    for id_ in db.employees:
+        assert db.modify_employee_field(id_, 'nombre', "Zed")
+    db.close()
+
+    reopened = EmployeeDatabase(path)
+    reopened.add_employees_with_random_data(2)
+    emails = [employee['email'] for employee in reopened.employees.values()]
+    assert len(set(emails)) == len(emails) == 4
+    assert "ana.pérez3@acme.com" in emails
+
+
+def test_emails_are_unique_after_removing_and_reopening(path, same_name):
+    db = EmployeeDatabase(path, email_suffix="acme")
+    db.add_employees_with_random_data(3)
+    db.remove_employee(next(iter(db.employees)))
+    db.add_employees_with_random_data(1)
+    assert "ana.pérez3@acme.com" in [employee['email'] for employee in db.employees.values()]
+    db.close()
+
+    reopened = EmployeeDatabase(path)
+    reopened.add_employees_with_random_data(2)
+    emails = [employee['email'] for employee in reopened.employees.values()]
+    assert len(set(emails)) == len(emails) == 5
+
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+COLUMN_DTYPES = {'departamento': 'int32', 'sueldo': 'float64'}
+
+
+def column_employees(count: int) -> dict:
+    return {
+        uuid.uuid4().bytes: {'departamento': row % 7, 'sueldo': float(row * 10)}
+        for row in range(count)
+    }
+
+
+def assert_selects(columns: _EmployeeColumns, employees: dict, jit_min_rows=None) -> None:
+    """
+    Check every comparison on every column against a brute-force scan of the employees
+    """
+    for field in COLUMN_DTYPES:
+        for value in (0, 3, 250.0):
+            for operator_, comparison_function in OPERATORS.items():
+                ids = columns.select(field, operator_, comparison_function, value, jit_min_rows)
+                expected = {id_ for id_, employee in employees.items() if comparison_function(employee[field], value)}
+                assert len(ids) == len(expected)
+                assert set(ids) == expected
+
+
+@pytest.fixture(params=[None, 0], ids=['numpy', 'numba'])
+def jit_min_rows(request):
+    if request.param is not None:
+        pytest.importorskip('numba')
+    return request.param
+
+
+def test_columns_select_matches_brute_force(jit_min_rows):
+    employees = column_employees(100)
+    columns = _EmployeeColumns(COLUMN_DTYPES, employees, lambda field, value: value)
+    assert_selects(columns, employees, jit_min_rows)
+
+
+def test_columns_tombstone_removed_rows(jit_min_rows):
+    employees = column_employees(100)
+    columns = _EmployeeColumns(COLUMN_DTYPES, employees, lambda field, value: value)
+    for id_ in list(employees)[:40]:
+        columns.remove(id_)
+        del employees[id_]
+    columns.remove(uuid.uuid4().bytes)
+
+    # Fewer dead rows than live ones are kept in place
+    assert columns._size == 100
+    assert columns._live[:100].sum() == 60
+    assert_selects(columns, employees, jit_min_rows)
+
+
+def test_columns_are_compacted_after_mass_removal(jit_min_rows):
+    employees = column_employees(200)
+    columns = _EmployeeColumns(COLUMN_DTYPES, employees, lambda field, value: value)
+    for id_ in list(employees)[:150]:
+        columns.remove(id_)
+        del employees[id_]
+
+    # Dead rows were dropped once they outnumbered the live ones
+    assert len(employees) <= columns._size < 2 * len(employees)
+    assert columns._live[:columns._size].sum() == len(employees)
+    assert all(columns._ids[row] == id_ for id_, row in columns._rows.items())
+    assert_selects(columns, employees, jit_min_rows)
+
+    # Rows added after compacting are appended after the live ones
+    added = column_employees(100)
+    for id_, employee in added.items():
+        columns.add(id_, employee)
+    employees.update(added)
+    assert columns._live[:columns._size].sum() == 150
+    assert_selects(columns, employees, jit_min_rows)
+
+
+def test_columns_update(jit_min_rows):
+    employees = column_employees(10)
+    columns = _EmployeeColumns(COLUMN_DTYPES, employees, lambda field, value: value)
+    id_ = next(iter(employees))
+    columns.update(id_, 'sueldo', 99999.0)
+    employees[id_]['sueldo'] = 99999.0
+    columns.update(uuid.uuid4().bytes, 'sueldo', 1.0)
+    columns.update(id_, 'nombre', "Zed")
+
+    assert list(columns.select('sueldo', '==', operator.eq, 99999.0, jit_min_rows)) == [id_]
+    assert_selects(columns, employees, jit_min_rows)
+
+
+def test_columns_drop_fields_that_cannot_be_converted():
+    employees = column_employees(10)
+    employees[next(iter(employees))]['sueldo'] = "N/A"
+    columns = _EmployeeColumns(COLUMN_DTYPES, employees, lambda field, value: value)
+    assert set(columns.columns) == {'departamento'}
+
+    columns.update(next(iter(employees)), 'departamento', "N/A")
+    assert columns.columns == {}
+
+
+def assert_indexes(db: EmployeeDatabase, values: dict) -> None:
+    """
+    Check equality lookups on the indexed fields against a scan of the employees, for their current values and the given ones
+    """
+    employees = snapshot(db)
+    for field in EmployeeDatabase.INDEXED_FIELDS:
+        for value in {employee[field] for employee in employees.values()} | {values[field]}:
+            expected = {id_ for id_, employee in employees.items() if employee[field] == value}
+            assert set(db.get_by_field(field, '==', value)) == expected
+
+
+def test_equality_indexes_follow_changes(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(20)
+    ids = list(db.employees)
+    removed = dict(db.employees[ids[0]])
+    renamed = dict(db.employees[ids[1]])
+    assert_indexes(db, removed)
+
+    assert db.remove_employee(ids[0])
+    assert_indexes(db, removed)
+    assert db.modify_employee_field(ids[1], 'nombre', "Zed")
+    assert db.modify_employee_field(ids[1], 'apellido', "Zimmer")
+    assert db.modify_employee_field(ids[1], 'departamento', "42")
+    assert_indexes(db, renamed)
+    assert set(db.get_by_field('departamento', '==', "42")) == {ids[1]}
+    db.close()
+
+    assert_indexes(EmployeeDatabase(path), renamed)
+
+
+def test_equality_indexes_after_reset_and_import(path, tmp_path):
+    pytest.importorskip('msgspec')
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(10)
+    export_path = str(tmp_path / "employees.msgpack")
+    assert db.export(export_path)
+    exported = snapshot(db)
+    employee = dict(next(iter(exported.values())))
+
+    assert db.reset_employees()
+    assert db._indexes == {field: {} for field in EmployeeDatabase.INDEXED_FIELDS}
+    db.add_employees_with_random_data(5)
+    assert_indexes(db, employee)
+
+    assert db.import_(export_path)
+    assert snapshot(db) == exported
+    assert_indexes(db, employee)
+
+
+class FailingFile:
+    """
+    Wrap the append handle of a database so the next write stops halfway through, as on a full disk
+    """
+
+    def __init__(self, file):
+        self._file = file
+
+    def write(self, data: bytes) -> int:
+        self._file.write(data[:len(data) // 2])
+        self._file.flush()
+        raise OSError("No space left on device")
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def fail_next_append(db: EmployeeDatabase) -> None:
+    db._log_file = FailingFile(open(db.FILE_PATH, 'ab'))
+
+
+def test_failed_add_is_rolled_back(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    expected = snapshot(db)
+
+    fail_next_append(db)
+    assert not db.add_employee_with_random_data()
+    assert snapshot(db) == expected
+    assert os.path.getsize(path) == db._file_size
+
+    # The log is still replayable, so later appends are read back
+    assert db.add_employee_with_random_data()
+    expected = snapshot(db)
+    db.close()
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_failed_modify_is_rolled_back(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    id_ = next(iter(db.employees))
+    nombre = db.employees[id_]['nombre']
+    assert db.get_by_field('sueldo', '>=', 0)
+    expected = snapshot(db)
+
+    fail_next_append(db)
+    assert not db.modify_employee_field(id_, 'nombre', "Zed")
+    fail_next_append(db)
+    assert not db.modify_employee_field(id_, 'sueldo', "-1")
+    assert snapshot(db) == expected
+    assert id_ in db.get_by_field('nombre', '==', nombre)
+    assert not db.get_by_field('nombre', '==', "Zed")
+    assert not db.get_by_field('sueldo', '<', 0)
+    db.close()
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_failed_remove_is_rolled_back(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    id_ = next(iter(db.employees))
+    expected = snapshot(db)
+
+    fail_next_append(db)
+    assert not db.remove_employee(id_)
+    assert snapshot(db) == expected
+    assert db.employee_exists(id_)
+    db.close()
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_failed_reset_is_rolled_back(path, monkeypatch):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    expected = snapshot(db)
+
+    def replace(src, dst):
+        raise OSError("Read-only file system")
+    monkeypatch.setattr(os, 'replace', replace)
+    assert not db.reset_employees()
+    monkeypatch.undo()
+
+    assert snapshot(db) == expected
+    db.close()
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_add_employees_stops_at_maximum(path):
+    db = EmployeeDatabase(path, max_employees=8)
+    assert db.add_employees_with_random_data(5) == 5
+    assert db.add_employees_with_random_data(5) == 3
+    assert db.add_employees_with_random_data(1) == 0
+    expected = snapshot(db)
+    assert len(expected) == 8
+    db.close()
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_bulk_update_writes_once_at_outermost_exit(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(2)
+    size = os.path.getsize(path)
+    with db.bulk_update():
+        with db.bulk_update():
+            db.add_employee_with_random_data()
+            db.modify_employee_field(next(iter(db.employees)), 'nombre', "Zed")
+        assert os.path.getsize(path) == size
+    assert os.path.getsize(path) == db._file_size > size
+
+    expected = snapshot(db)
+    db.close()
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+class UnflushableFile(FailingFile):
+    """
+    Wrap the append handle of a database so buffered writes cannot be flushed
+    """
+
+    def write(self, data: bytes) -> int:
+        return self._file.write(data)
+
+    def flush(self) -> None:
+        raise OSError("No space left on device")
+
+
+def test_failed_bulk_update_discards_the_group(path):
+    db = EmployeeDatabase(path)
+    db.add_employees_with_random_data(5)
+    expected = snapshot(db)
+    size = os.path.getsize(path)
+
+    with db.bulk_update():
+        db._log_file = UnflushableFile(open(path, 'ab'))
+        db.add_employees_with_random_data(3)
+        db.remove_employee(next(iter(db.employees)))
+        assert len(db.employees) == 7
+
+    assert snapshot(db) == expected
+    assert os.path.getsize(path) == size
+    assert db.add_employee_with_random_data()
+    expected = snapshot(db)
+    db.close()
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_invalid_durability_is_rejected(path):
+    with pytest.raises(ValueError):
+        EmployeeDatabase(path, durability='eventual')
+
+
+@pytest.mark.parametrize('durability, syncs', [('relaxed', 0), ('strict', 3), (None, 0)])
+def test_durability_controls_syncs_per_write(path, monkeypatch, durability, syncs):
+    db = EmployeeDatabase(path, durability=durability)
+    db.add_employees_with_random_data(3)
+    ids = list(db.employees)
+
+    fsync = os.fsync
+    synced = []
+    monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd) or fsync(fd))
+    db.add_employee_with_random_data()
+    db.modify_employee_field(ids[0], 'nombre', "Zed")
+    db.remove_employee(ids[1])
+    assert len(synced) == syncs
+
+    assert db.flush()
+    assert len(synced) == syncs + 1
+    expected = snapshot(db)
+    monkeypatch.undo()
+    db.close()
+    assert snapshot(EmployeeDatabase(path)) == expected
+
+
+def test_no_op_changes_are_not_written(path):
+    db = EmployeeDatabase(path)
+    assert db.reset_employees()
+    db.add_employees_with_random_data(3)
+    id_ = next(iter(db.employees))
+    employee = db.format_employee(db.employees[id_])
+    size = os.path.getsize(path)
+
+    assert db.modify_employee_field(id_, 'nombre', employee['nombre'])
+    assert db.modify_employee_field(id_, 'departamento', str(employee['departamento']))
+    assert db.modify_employee_field(id_, 'sueldo', employee['sueldo'])
+    db.flush()
+    assert os.path.getsize(path) == size
+
+    assert db.reset_employees()
+    stat = os.stat(path)
+    assert db.reset_employees()
+    # Resetting an empty database does not rewrite the file
+    assert os.stat(path).st_ino == stat.st_ino
+    assert os.path.getsize(path) == stat.st_size
+    assert db.get_employees() == {}